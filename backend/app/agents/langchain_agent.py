@@ -18,6 +18,7 @@ SUPPORTED_TOOLS = [
     "sql_find_facilities_by_service",
     "sql_region_ranking",
     "geo_within_km",
+    "geo_nearest_with_capability",
     "geo_cold_spots",
     "anomaly_unrealistic_procedure_breadth",
     "correlation_feature_movement",
@@ -8,6 +8,7 @@ INTENTS = {
     "FACILITY_LOOKUP",
     "REGION_RANKING",
     "GEO_WITHIN_DISTANCE",
+    "GEO_NEAREST",
     "GEO_COLD_SPOT",
     "VALIDATION_MISSING_DEPENDENCY",
     "MISREP_BREADTH_VS_INFRA",
@@ -32,6 +33,8 @@ def classify_query(question: str) -> RoutedQuery:
         return RoutedQuery("GEO_COLD_SPOT", "cold spot detection")
     if "within" in q and "km" in q:
         return RoutedQuery("GEO_WITHIN_DISTANCE", "geo within distance")
+    if "nearest" in q or "closest" in q:
+        return RoutedQuery("GEO_NEAREST", "nearest facilities with capability")
     if "most" in q and "region" in q:
         return RoutedQuery("REGION_RANKING", "region ranking")
     if "services does" in q or "offer" in q:
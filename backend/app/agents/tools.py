@@ -3,11 +3,16 @@ from __future__ import annotations
 from collections import Counter
 from typing import Any
 
+import numpy as np
 from sqlalchemy import select
 
 from app.db import SessionLocal
 from app.models import Facility, Extraction, EvidenceSpan, Anomaly
-from app.geo import filter_within_km
+from app.analytics import co_occurrence, co_occurrence_surprise
+from app.capabilities import load_capability_matrix
+from app.coverage import cold_spots
+from app.scarcity import sole_providers
+from app.spatial import capability_index
 
 
 def _latest_extraction_subquery():
@@ -131,41 +136,21 @@ def sql_region_ranking(metric: str, filters: dict[str, Any]) -> dict[str, Any]:
 
 
 def geo_within_km(condition_or_service: str, lat: float, lon: float, km: float) -> dict[str, Any]:
-    with SessionLocal() as session:
-        query = session.query(Facility, Extraction).join(Extraction, Extraction.facility_id == Facility.id)
-        rows = []
-        for facility, extraction in query.all():
-            extracted = extraction.extracted_json or {}
-            if condition_or_service in extracted.get("procedures", []):
-                rows.append({"facility_id": facility.id, "name": facility.name, "lat": facility.lat, "lon": facility.lon})
-            if extracted.get("services", {}).get(condition_or_service, {}).get("available"):
-                rows.append({"facility_id": facility.id, "name": facility.name, "lat": facility.lat, "lon": facility.lon})
-        within = filter_within_km(rows, lat, lon, km)
-        return {"results": within}
+    index = capability_index(condition_or_service)
+    indices, distances = index.grid.within_km(lat, lon, km)
+    return {"results": index.rows(indices, distances)}
 
 
-def geo_cold_spots(service_or_bundle: str, km: float, region_level: str) -> dict[str, Any]:
-    with SessionLocal() as session:
-        facilities = session.query(Facility, Extraction).join(Extraction, Extraction.facility_id == Facility.id).all()
-        by_region = {}
-        for facility, extraction in facilities:
-            key = facility.region if region_level == "region" else facility.district
-            if key not in by_region:
-                by_region[key] = {"facilities": [], "meets": 0}
-            by_region[key]["facilities"].append((facility, extraction))
-
-        cold = []
-        for key, payload in by_region.items():
-            meets = 0
-            for facility, extraction in payload["facilities"]:
-                extracted = extraction.extracted_json or {}
-                if service_or_bundle in extracted.get("procedures", []):
-                    meets += 1
-                if extracted.get("services", {}).get(service_or_bundle, {}).get("available"):
-                    meets += 1
-            if meets == 0:
-                cold.append(key)
-        return {"cold_spots": cold, "region_level": region_level}
+def geo_nearest_with_capability(capability: str, lat: float, lon: float, k: int = 5) -> dict[str, Any]:
+    index = capability_index(capability)
+    indices, distances = index.grid.nearest(lat, lon, int(k))
+    return {"results": index.rows(indices, distances), "capability": capability, "k": int(k)}
+
+
+def geo_cold_spots(service_or_bundle: str | list[str], km: float, region_level: str) -> dict[str, Any]:
+    if isinstance(service_or_bundle, list):
+        service_or_bundle = "+".join(service_or_bundle)
+    return cold_spots(service_or_bundle, float(km), region_level)
 
 
 def anomaly_facilities_missing_equipment(service: str, required_equipment: list[str]) -> dict[str, Any]:
@@ -202,22 +187,63 @@ def anomaly_unrealistic_procedure_breadth() -> dict[str, Any]:
 
 
 def correlation_feature_movement(features: list[str], filters: dict[str, Any]) -> dict[str, Any]:
-    with SessionLocal() as session:
-        query = session.query(Facility, Extraction).join(Extraction, Extraction.facility_id == Facility.id)
-        pairs = []
-        for facility, extraction in query.all():
-            extracted = extraction.extracted_json or {}
-            row = {"facility_id": facility.id, "name": facility.name}
-            for feature in features:
-                if feature.startswith("procedures."):
-                    value = feature.split(".")[1] in extracted.get("procedures", [])
-                elif feature.startswith("services."):
-                    value = extracted.get("services", {}).get(feature.split(".")[1], {}).get("available", False)
-                else:
-                    value = None
-                row[feature] = value
-            pairs.append(row)
-        return {"results": pairs}
+    matrix = load_capability_matrix(filters, features or None)
+    stats = co_occurrence(matrix.values)
+    top_k = int(filters.get("top_k") or (0 if features else 25))
+
+    pairs = []
+    for i, j in zip(*np.triu_indices(len(matrix.features), k=1)):
+        if not features and (stats.support[i] == 0 or stats.support[j] == 0):
+            continue
+        pairs.append(
+            {
+                "a": matrix.features[i],
+                "b": matrix.features[j],
+                "both": int(stats.both[i, j]),
+                "phi": _rounded(stats.phi[i, j]),
+                "lift": _rounded(stats.lift[i, j]),
+                "p_b_given_a": _rounded(stats.conditional[i, j]),
+                "p_a_given_b": _rounded(stats.conditional[j, i]),
+            }
+        )
+    pairs.sort(key=lambda p: -abs(p["phi"] or 0.0))
+    # Negatively associated pairs that still co-occur are the "shouldn't move together" signals.
+    mismatched = sorted(
+        (p for p in pairs if p["both"] and (p["phi"] or 0.0) < 0),
+        key=lambda p: p["phi"],
+    )
+
+    result: dict[str, Any] = {
+        "facility_count": stats.n,
+        "features": [
+            {"feature": name, "support": int(stats.support[i])} for i, name in enumerate(matrix.features)
+        ],
+        "results": pairs[:top_k] if top_k else pairs,
+        "pair_count": len(pairs),
+        "mismatched_pairs": mismatched[: top_k or 25],
+    }
+
+    outlier_count = int(filters.get("outliers", 10) or 0)
+    if outlier_count:
+        scores = co_occurrence_surprise(matrix.values, stats)
+        order = np.argsort(-scores, kind="stable")[:outlier_count]
+        result["outliers"] = [
+            {
+                "facility_id": int(matrix.facility_ids[i]),
+                "name": matrix.names[i],
+                "score": _rounded(scores[i]),
+                "features": [name for name, present in zip(matrix.features, matrix.values[i]) if present],
+            }
+            for i in order
+            if scores[i] > 0
+        ]
+    return result
+
+
+def _rounded(value: float) -> float | None:
+    if value is None or not np.isfinite(value):
+        return None
+    return round(float(value), 4)
 
 
 def workforce_where_practicing(subspecialty: str, filters: dict[str, Any]) -> dict[str, Any]:
@@ -232,16 +258,7 @@ def workforce_where_practicing(subspecialty: str, filters: dict[str, Any]) -> di
 
 
 def scarcity_dependency_on_few(procedure: str, region_filters: dict[str, Any]) -> dict[str, Any]:
-    with SessionLocal() as session:
-        query = session.query(Facility, Extraction).join(Extraction, Extraction.facility_id == Facility.id)
-        if region_filters.get("region"):
-            query = query.filter(Facility.region == region_filters["region"])
-        providers = []
-        for facility, extraction in query.all():
-            if procedure in (extraction.extracted_json or {}).get("procedures", []):
-                providers.append({"facility_id": facility.id, "name": facility.name})
-        dependency = len(providers) <= 2
-        return {"providers": providers, "dependency": dependency}
+    return sole_providers(procedure, float(region_filters.get("km") or 50), region_filters.get("region"))
 
 
 def oversupply_vs_scarcity(low_complexity_set: list[str], high_complexity_set: list[str], filters: dict[str, Any]) -> dict[str, Any]:
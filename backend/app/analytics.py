@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class CoOccurrence:
+    n: int
+    support: np.ndarray
+    both: np.ndarray
+    phi: np.ndarray
+    lift: np.ndarray
+    conditional: np.ndarray
+
+
+def co_occurrence(values: np.ndarray) -> CoOccurrence:
+    """Pairwise phi, lift and P(col | row) for a boolean facility x feature matrix.
+
+    All statistics come from a single X^T X product, so the cost is one matrix
+    multiply regardless of how many feature pairs are requested.
+    """
+    x = values.astype(np.float64, copy=False)
+    n = x.shape[0]
+    support = x.sum(axis=0)
+    both = x.T @ x
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expected = np.outer(support, support)
+        variance = np.outer(support * (n - support), support * (n - support))
+        phi = (n * both - expected) / np.sqrt(variance)
+        lift = n * both / expected
+        conditional = both / support[:, None]
+
+    return CoOccurrence(
+        n=n,
+        support=support,
+        both=both,
+        phi=np.where(np.isfinite(phi), phi, np.nan),
+        lift=np.where(np.isfinite(lift), lift, np.nan),
+        conditional=np.where(np.isfinite(conditional), conditional, np.nan),
+    )
+
+
+def co_occurrence_surprise(values: np.ndarray, stats: CoOccurrence) -> np.ndarray:
+    """Score each facility by how badly its feature combination fits the learned phi structure.
+
+    A facility is penalised by |phi| for every positively associated pair it splits
+    (has one feature but not the other) and for every negatively associated pair it
+    holds together. Scores are normalised by the number of feature pairs.
+    """
+    x = values.astype(np.float64, copy=False)
+    f = x.shape[1]
+    if f < 2 or x.shape[0] == 0:
+        return np.zeros(x.shape[0])
+
+    phi = np.nan_to_num(stats.phi, nan=0.0)
+    np.fill_diagonal(phi, 0.0)
+    positive = np.clip(phi, 0.0, None)
+    negative = np.clip(-phi, 0.0, None)
+
+    # sum_{i,j} P_ij * x_j * (1 - x_i) counts each split positive pair exactly once.
+    split = ((x @ positive) * (1.0 - x)).sum(axis=1)
+    # sum_{i,j} N_ij * x_i * x_j counts each co-present negative pair twice.
+    clash = ((x @ negative) * x).sum(axis=1) / 2.0
+    return (split + clash) / (f * (f - 1) / 2.0)
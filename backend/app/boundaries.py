@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import json
+import math
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator
+
+import numpy as np
+
+from app.config import settings
+from app.db import SessionLocal
+from app.models import Facility
+from app.versioning import bump_version
+
+ADMIN_LEVELS = ("region", "district")
+PIP_BLOCK = 2_000_000
+
+
+class STRTree:
+    """Sort-Tile-Recursive packed R-tree over axis-aligned boxes (min_x, min_y, max_x, max_y)."""
+
+    def __init__(self, boxes: np.ndarray, capacity: int = 16):
+        self.boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+        self.capacity = capacity
+        self.levels: list[tuple[np.ndarray, list[np.ndarray]]] = []
+        current = self.boxes
+        while len(current):
+            groups = self._pack(current)
+            node_boxes = np.array(
+                [
+                    [current[g, 0].min(), current[g, 1].min(), current[g, 2].max(), current[g, 3].max()]
+                    for g in groups
+                ]
+            )
+            self.levels.append((node_boxes, groups))
+            if len(groups) == 1:
+                break
+            current = node_boxes
+
+    def _pack(self, boxes: np.ndarray) -> list[np.ndarray]:
+        count = len(boxes)
+        leaves = math.ceil(count / self.capacity)
+        slabs = math.ceil(math.sqrt(leaves))
+        per_slab = slabs * self.capacity
+        cx = (boxes[:, 0] + boxes[:, 2]) / 2
+        cy = (boxes[:, 1] + boxes[:, 3]) / 2
+        by_x = np.argsort(cx, kind="stable")
+        groups = []
+        for start in range(0, count, per_slab):
+            slab = by_x[start : start + per_slab]
+            slab = slab[np.argsort(cy[slab], kind="stable")]
+            groups.extend(slab[i : i + self.capacity] for i in range(0, len(slab), self.capacity))
+        return groups
+
+    def query_points(self, x: np.ndarray, y: np.ndarray) -> Iterator[tuple[int, np.ndarray]]:
+        """Yield (box id, point indices inside that box), descending the tree with whole point sets."""
+        if not self.levels:
+            return
+        top = len(self.levels) - 1
+        stack = [(top, 0, np.flatnonzero(np.isfinite(x) & np.isfinite(y)))]
+        while stack:
+            level, node, points = stack.pop()
+            children = self.levels[level][1][node]
+            child_boxes = self.boxes if level == 0 else self.levels[level - 1][0]
+            for child in children:
+                box = child_boxes[child]
+                px, py = x[points], y[points]
+                hit = points[(px >= box[0]) & (px <= box[2]) & (py >= box[1]) & (py <= box[3])]
+                if not len(hit):
+                    continue
+                if level == 0:
+                    yield int(child), hit
+                else:
+                    stack.append((level - 1, int(child), hit))
+
+
+def points_in_rings(x: np.ndarray, y: np.ndarray, rings: list[np.ndarray]) -> np.ndarray:
+    """Even-odd point-in-polygon test; holes are just additional rings."""
+    xi = np.concatenate([ring[:, 0] for ring in rings])
+    yi = np.concatenate([ring[:, 1] for ring in rings])
+    xj = np.concatenate([np.roll(ring[:, 0], -1) for ring in rings])
+    yj = np.concatenate([np.roll(ring[:, 1], -1) for ring in rings])
+    inside = np.zeros(len(x), dtype=bool)
+    step = max(PIP_BLOCK // max(len(xi), 1), 1)
+    for start in range(0, len(x), step):
+        px = x[start : start + step, None]
+        py = y[start : start + step, None]
+        straddles = (yi > py) != (yj > py)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            crossing_x = (xj - xi) * (py - yi) / (yj - yi) + xi
+        crossings = np.count_nonzero(straddles & (px < crossing_x), axis=1)
+        inside[start : start + step] = crossings % 2 == 1
+    return inside
+
+
+@dataclass
+class AdminLayer:
+    names: list[str]
+    rings: list[list[np.ndarray]]
+    tree: STRTree
+
+    def assign(self, lats: np.ndarray, lons: np.ndarray) -> list[str | None]:
+        assigned = np.full(len(lats), -1, dtype=np.int64)
+        for polygon, candidates in self.tree.query_points(lons, lats):
+            candidates = candidates[assigned[candidates] < 0]
+            if not len(candidates):
+                continue
+            inside = points_in_rings(lons[candidates], lats[candidates], self.rings[polygon])
+            assigned[candidates[inside]] = polygon
+        return [self.names[i] if i >= 0 else None for i in assigned]
+
+
+class AdminAreas:
+    """Administrative polygons from a GeoJSON FeatureCollection, indexed per admin level."""
+
+    def __init__(self, layers: dict[str, AdminLayer]):
+        self.layers = layers
+
+    @classmethod
+    def from_geojson(cls, payload: dict[str, Any]) -> "AdminAreas":
+        polygons: dict[str, list[tuple[str, list[np.ndarray]]]] = {level: [] for level in ADMIN_LEVELS}
+        for feature in payload.get("features", []):
+            properties = feature.get("properties") or {}
+            level = str(properties.get(settings.admin_level_property, "")).lower()
+            name = properties.get(settings.admin_name_property)
+            geometry = feature.get("geometry") or {}
+            if level not in polygons or not name:
+                continue
+            if geometry.get("type") == "Polygon":
+                parts = [geometry["coordinates"]]
+            elif geometry.get("type") == "MultiPolygon":
+                parts = geometry["coordinates"]
+            else:
+                continue
+            for part in parts:
+                rings = [np.asarray(ring, dtype=float)[:, :2] for ring in part if len(ring) >= 3]
+                if rings:
+                    polygons[level].append((str(name), rings))
+
+        layers = {}
+        for level, entries in polygons.items():
+            if not entries:
+                continue
+            boxes = np.array(
+                [[r[0][:, 0].min(), r[0][:, 1].min(), r[0][:, 0].max(), r[0][:, 1].max()] for _, r in entries]
+            )
+            layers[level] = AdminLayer(
+                names=[name for name, _ in entries],
+                rings=[rings for _, rings in entries],
+                tree=STRTree(boxes),
+            )
+        return cls(layers)
+
+    def bounds(self) -> tuple[float, float, float, float] | None:
+        """(min_lon, min_lat, max_lon, max_lat) over every layer."""
+        roots = [layer.tree.levels[-1][0][0] for layer in self.layers.values() if layer.tree.levels]
+        if not roots:
+            return None
+        stacked = np.array(roots)
+        return stacked[:, 0].min(), stacked[:, 1].min(), stacked[:, 2].max(), stacked[:, 3].max()
+
+    def assign(self, lats: np.ndarray, lons: np.ndarray) -> dict[str, list[str | None]]:
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        return {level: layer.assign(lats, lons) for level, layer in self.layers.items()}
+
+
+_lock = threading.Lock()
+_loaded: tuple[tuple[str, float], AdminAreas] | None = None
+
+
+def load_admin_areas() -> AdminAreas | None:
+    """Boundaries from ADMIN_BOUNDARIES_PATH, reloaded when the file changes; None when unset."""
+    global _loaded
+    if not settings.admin_boundaries_path:
+        return None
+    path = Path(settings.admin_boundaries_path)
+    if not path.exists():
+        return None
+    key = (str(path), path.stat().st_mtime)
+    with _lock:
+        if _loaded is None or _loaded[0] != key:
+            _loaded = (key, AdminAreas.from_geojson(json.loads(path.read_text(encoding="utf-8"))))
+        return _loaded[1]
+
+
+def reassign_facilities() -> int:
+    """Re-run admin assignment for every stored facility, e.g. after the boundary file changes."""
+    areas = load_admin_areas()
+    if areas is None:
+        return 0
+    with SessionLocal() as session:
+        facilities = session.query(Facility).all()
+        lats = np.array([f.lat if f.lat is not None else np.nan for f in facilities], dtype=float)
+        lons = np.array([f.lon if f.lon is not None else np.nan for f in facilities], dtype=float)
+        assigned = areas.assign(lats, lons)
+        for i, facility in enumerate(facilities):
+            source = facility.raw_structured_json or {}
+            for level, names in assigned.items():
+                setattr(facility, level, names[i] or source.get(f"source_{level}") or getattr(facility, level))
+        bump_version(session)
+        session.commit()
+    return len(facilities)
+
+
+if __name__ == "__main__":
+    print({"reassigned": reassign_facilities()})
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+
+import numpy as np
+from sqlalchemy import func, select
+
+from app.db import SessionLocal
+from app.models import Facility, Extraction
+from app.versioning import current_version
+
+_registry_lock = threading.Lock()
+_registry: tuple[int, "CapabilityMatrix"] | None = None
+
+
+@dataclass
+class CapabilityMatrix:
+    facility_ids: np.ndarray
+    names: list[str]
+    regions: list[str | None]
+    districts: list[str | None]
+    lat: np.ndarray
+    lon: np.ndarray
+    features: list[str]
+    values: np.ndarray
+    raw_structured: list[dict[str, Any]] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        self._feature_index = {name: i for i, name in enumerate(self.features)}
+
+    def __len__(self) -> int:
+        return len(self.facility_ids)
+
+    def column(self, feature: str) -> np.ndarray:
+        if feature not in self._feature_index:
+            return np.zeros(len(self), dtype=bool)
+        return self.values[:, self._feature_index[feature]]
+
+    def provides(self, capability: str) -> np.ndarray:
+        """Facilities offering `capability` as a procedure or an available service.
+
+        A bundle such as "c_section+surgery" requires every member at the same facility.
+        """
+        if "+" in capability:
+            mask = np.ones(len(self), dtype=bool)
+            for part in capability.split("+"):
+                mask &= self.provides(part.strip())
+            return mask
+        if "." in capability:
+            return self.column(capability)
+        return self.column(f"procedures.{capability}") | self.column(f"services.{capability}")
+
+    def subset(self, mask: np.ndarray) -> "CapabilityMatrix":
+        index = np.flatnonzero(mask)
+        return CapabilityMatrix(
+            facility_ids=self.facility_ids[index],
+            names=[self.names[i] for i in index],
+            regions=[self.regions[i] for i in index],
+            districts=[self.districts[i] for i in index],
+            lat=self.lat[index],
+            lon=self.lon[index],
+            features=self.features,
+            values=self.values[index],
+            raw_structured=[self.raw_structured[i] for i in index] if self.raw_structured else [],
+        )
+
+
+def profile_features(extracted: dict[str, Any]) -> set[str]:
+    features = {f"procedures.{name}" for name in extracted.get("procedures", [])}
+    for name, detail in (extracted.get("services") or {}).items():
+        if isinstance(detail, dict) and detail.get("available"):
+            features.add(f"services.{name}")
+    for name, present in (extracted.get("equipment") or {}).items():
+        if present:
+            features.add(f"equipment.{name}")
+    return features
+
+
+def _latest_ids_subquery():
+    return select(func.max(Extraction.id).label("id")).group_by(Extraction.facility_id).subquery()
+
+
+def load_capability_matrix(
+    filters: dict[str, Any] | None = None,
+    features: Iterable[str] | None = None,
+) -> CapabilityMatrix:
+    """Load the latest extraction of every facility as a boolean facility x feature matrix."""
+    filters = filters or {}
+    latest = _latest_ids_subquery()
+    with SessionLocal() as session:
+        query = (
+            session.query(Facility, Extraction)
+            .join(Extraction, Extraction.facility_id == Facility.id)
+            .join(latest, latest.c.id == Extraction.id)
+        )
+        if filters.get("region"):
+            query = query.filter(Facility.region == filters["region"])
+        if filters.get("district"):
+            query = query.filter(Facility.district == filters["district"])
+        facility_type = str(filters.get("facility_type") or "").lower()
+
+        rows = []
+        for facility, extraction in query.order_by(Facility.id).all():
+            raw_structured = facility.raw_structured_json or {}
+            if facility_type and str(raw_structured.get("facility_type", "")).lower() != facility_type:
+                continue
+            rows.append((facility, raw_structured, profile_features(extraction.extracted_json or {})))
+
+    if features is None:
+        feature_list = sorted({name for _, _, present in rows for name in present})
+    else:
+        feature_list = list(dict.fromkeys(features))
+    index = {name: i for i, name in enumerate(feature_list)}
+
+    values = np.zeros((len(rows), len(feature_list)), dtype=bool)
+    for row, (_, _, present) in enumerate(rows):
+        for name in present:
+            column = index.get(name)
+            if column is not None:
+                values[row, column] = True
+
+    return CapabilityMatrix(
+        facility_ids=np.array([f.id for f, _, _ in rows], dtype=np.int64),
+        names=[f.name for f, _, _ in rows],
+        regions=[f.region for f, _, _ in rows],
+        districts=[f.district for f, _, _ in rows],
+        lat=np.array([f.lat if f.lat is not None else np.nan for f, _, _ in rows], dtype=float),
+        lon=np.array([f.lon if f.lon is not None else np.nan for f, _, _ in rows], dtype=float),
+        features=feature_list,
+        values=values,
+        raw_structured=[raw for _, raw, _ in rows],
+    )
+
+
+def registry_matrix(version: int | None = None) -> CapabilityMatrix:
+    """Unfiltered capability matrix for the current dataset version, shared across requests."""
+    global _registry
+    version = current_version() if version is None else version
+    with _registry_lock:
+        if _registry is None or _registry[0] != version:
+            _registry = (version, load_capability_matrix())
+        return _registry[1]
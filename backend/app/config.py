@@ -10,6 +10,11 @@ class Settings(BaseSettings):
     databricks_server_hostname: str | None = None
     databricks_http_path: str | None = None
     databricks_access_token: str | None = None
+    coverage_cell_km: float = 5.0
+    coverage_max_cells: int = 250_000
+    admin_boundaries_path: str | None = None
+    admin_level_property: str = "admin_level"
+    admin_name_property: str = "name"
 
 
 settings = Settings()
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import math
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from app.boundaries import load_admin_areas
+from app.capabilities import CapabilityMatrix, registry_matrix
+from app.config import settings
+from app.geo import EARTH_RADIUS_KM
+from app.spatial import KM_PER_DEGREE, GridIndex, capability_index
+from app.versioning import current_version
+
+GRID_MARGIN_DEG = 0.25
+
+
+@dataclass
+class CoverageGrid:
+    """Raster of cell centres over the facility extent (or the boundary polygons), labelled with admin areas."""
+
+    lat: np.ndarray
+    lon: np.ndarray
+    area_km2: np.ndarray
+    cell_km: float
+    labels: dict[str, tuple[np.ndarray, list[str]]]
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+
+def build_grid(matrix: CapabilityMatrix, cell_km: float, max_cells: int) -> CoverageGrid:
+    located = np.isfinite(matrix.lat) & np.isfinite(matrix.lon)
+    if not located.any():
+        return CoverageGrid(np.empty(0), np.empty(0), np.empty(0), cell_km, {})
+
+    lat_lo = max(float(matrix.lat[located].min()) - GRID_MARGIN_DEG, -90.0)
+    lat_hi = min(float(matrix.lat[located].max()) + GRID_MARGIN_DEG, 90.0)
+    lon_lo = float(matrix.lon[located].min()) - GRID_MARGIN_DEG
+    lon_hi = float(matrix.lon[located].max()) + GRID_MARGIN_DEG
+    areas = load_admin_areas()
+    bounds = areas.bounds() if areas is not None else None
+    if bounds is not None:
+        lon_lo, lat_lo = min(lon_lo, bounds[0]), max(min(lat_lo, bounds[1]), -90.0)
+        lon_hi, lat_hi = max(lon_hi, bounds[2]), min(max(lat_hi, bounds[3]), 90.0)
+    mid_cos = max(math.cos(math.radians((lat_lo + lat_hi) / 2)), 0.01)
+
+    while True:
+        dlat = cell_km / KM_PER_DEGREE
+        dlon = dlat / mid_cos
+        rows = max(int(math.ceil((lat_hi - lat_lo) / dlat)), 1)
+        cols = max(int(math.ceil((lon_hi - lon_lo) / dlon)), 1)
+        if rows * cols <= max_cells:
+            break
+        cell_km *= math.sqrt(rows * cols / max_cells) * 1.01
+
+    lat_edges = np.minimum(lat_lo + dlat * np.arange(rows + 1), 90.0)
+    lat_centres = (lat_edges[:-1] + lat_edges[1:]) / 2
+    lon_centres = lon_lo + dlon * (np.arange(cols) + 0.5)
+    band_area = EARTH_RADIUS_KM**2 * math.radians(dlon) * np.abs(
+        np.sin(np.radians(lat_edges[1:])) - np.sin(np.radians(lat_edges[:-1]))
+    )
+
+    grid_lat = np.repeat(lat_centres, cols)
+    grid_lon = np.tile(lon_centres, rows)
+    area = np.repeat(band_area, cols)
+
+    polygons = {}
+    if areas is not None:
+        polygons = areas.assign(grid_lat, grid_lon)
+        # With boundaries loaded the raster is clipped to the country instead of the facility bbox.
+        outer = polygons.get("region") or polygons.get("district")
+        if outer is not None:
+            keep = np.array([name is not None for name in outer], dtype=bool)
+            grid_lat, grid_lon, area = grid_lat[keep], grid_lon[keep], area[keep]
+            polygons = {level: [n for n, k in zip(names, keep) if k] for level, names in polygons.items()}
+
+    labels = {}
+    for level, values in (("region", matrix.regions), ("district", matrix.districts)):
+        if level in polygons:
+            labels[level] = _encode(polygons[level])
+        else:
+            labels[level] = _nearest_labels(values, matrix, grid_lat, grid_lon)
+    return CoverageGrid(grid_lat, grid_lon, area, cell_km, labels)
+
+
+def _encode(values: list[str | None]) -> tuple[np.ndarray, list[str]]:
+    names = sorted({value for value in values if value is not None})
+    lookup = {name: i for i, name in enumerate(names)}
+    return np.array([lookup.get(value, -1) for value in values], dtype=np.int64), names
+
+
+def _nearest_labels(
+    values: list[str | None],
+    matrix: CapabilityMatrix,
+    grid_lat: np.ndarray,
+    grid_lon: np.ndarray,
+) -> tuple[np.ndarray, list[str]]:
+    """Label each cell with the admin area of its nearest labelled facility."""
+    labelled = np.array([value is not None for value in values], dtype=bool)
+    codes, names = _encode(values)
+    if not names:
+        return np.full(len(grid_lat), -1, dtype=np.int64), []
+    codes = codes[labelled]
+    index = GridIndex(matrix.lat[labelled], matrix.lon[labelled])
+    nearest, _ = index.nearest_many(grid_lat, grid_lon, 1)
+    cell_codes = np.where(nearest[:, 0] >= 0, codes[nearest[:, 0]], -1)
+    return cell_codes, names
+
+
+_lock = threading.Lock()
+_grid: tuple[int, CoverageGrid] | None = None
+_distances: dict[str, tuple[int, np.ndarray]] = {}
+
+
+def coverage_grid(version: int | None = None) -> CoverageGrid:
+    global _grid
+    version = current_version() if version is None else version
+    with _lock:
+        if _grid is not None and _grid[0] == version:
+            return _grid[1]
+    grid = build_grid(registry_matrix(version), settings.coverage_cell_km, settings.coverage_max_cells)
+    with _lock:
+        _grid = (version, grid)
+    return grid
+
+
+def distance_to_provider(capability: str) -> tuple[CoverageGrid, np.ndarray]:
+    """Per-cell distance to the nearest provider of `capability`, cached per dataset version."""
+    version = current_version()
+    grid = coverage_grid(version)
+    with _lock:
+        cached = _distances.get(capability)
+        if cached and cached[0] == version:
+            return grid, cached[1]
+    index = capability_index(capability)
+    _, nearest = index.grid.nearest_many(grid.lat, grid.lon, 1)
+    distances = nearest[:, 0]
+    with _lock:
+        for key in [key for key, (built, _) in _distances.items() if built != version]:
+            del _distances[key]
+        _distances[capability] = (version, distances)
+    return grid, distances
+
+
+def cold_spots(capability: str, km: float, region_level: str = "region", limit: int = 20) -> dict[str, Any]:
+    grid, distances = distance_to_provider(capability)
+    uncovered = distances > km
+    codes, names = grid.labels.get(region_level, (np.full(len(grid), -1, dtype=np.int64), []))
+    # Shift by one so unlabelled cells (-1) land in bucket 0.
+    buckets = len(names) + 1
+    total_area = np.bincount(codes + 1, weights=grid.area_km2, minlength=buckets)
+    uncovered_area = np.bincount(codes + 1, weights=grid.area_km2 * uncovered, minlength=buckets)
+    worst = np.zeros(buckets)
+    if len(grid):
+        np.maximum.at(worst, codes + 1, np.where(np.isfinite(distances), distances, np.inf))
+
+    areas = []
+    for bucket in np.argsort(-uncovered_area, kind="stable"):
+        if uncovered_area[bucket] <= 0:
+            continue
+        areas.append(
+            {
+                region_level: names[bucket - 1] if bucket else None,
+                "uncovered_km2": round(float(uncovered_area[bucket]), 1),
+                "total_km2": round(float(total_area[bucket]), 1),
+                "uncovered_share": round(float(uncovered_area[bucket] / total_area[bucket]), 4),
+                "max_distance_km": _km(worst[bucket]),
+            }
+        )
+
+    cold = np.flatnonzero(uncovered)
+    cold = cold[np.argsort(-distances[cold], kind="stable")][:limit]
+    return {
+        "capability": capability,
+        "km": km,
+        "region_level": region_level,
+        "cell_km": round(grid.cell_km, 3),
+        "uncovered_km2": round(float(grid.area_km2[uncovered].sum()), 1),
+        "total_km2": round(float(grid.area_km2.sum()), 1),
+        "cold_spots": areas,
+        "cold_cells": [
+            {
+                "lat": round(float(grid.lat[i]), 5),
+                "lon": round(float(grid.lon[i]), 5),
+                "distance_km": _km(distances[i]),
+                region_level: names[codes[i]] if codes[i] >= 0 else None,
+            }
+            for i in cold
+        ],
+    }
+
+
+def _km(value: float) -> float | None:
+    return round(float(value), 2) if np.isfinite(value) else None
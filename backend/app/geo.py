@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 import math
-from typing import Iterable
+from typing import Iterable, Iterator
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
 
 
 def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    r = 6371.0
+    r = EARTH_RADIUS_KM
     phi1 = math.radians(lat1)
     phi2 = math.radians(lat2)
     dphi = math.radians(lat2 - lat1)
@@ -15,6 +19,62 @@ def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     return r * c
 
 
+def haversine_many(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Distances in km from one origin to every point; NaN coordinates give NaN."""
+    phi1 = math.radians(lat)
+    phi2 = np.radians(np.asarray(lats, dtype=float))
+    dphi = phi2 - phi1
+    dlambda = np.radians(np.asarray(lons, dtype=float) - lon)
+    a = np.sin(dphi / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine_chunks(
+    origin_lats: np.ndarray,
+    origin_lons: np.ndarray,
+    lats: np.ndarray,
+    lons: np.ndarray,
+    chunk_size: int = 1024,
+) -> Iterator[tuple[slice, np.ndarray]]:
+    """Yield (origin slice, distance block) pairs so memory stays at chunk_size x len(points)."""
+    olat = np.radians(np.asarray(origin_lats, dtype=float))
+    olon = np.radians(np.asarray(origin_lons, dtype=float))
+    plat = np.radians(np.asarray(lats, dtype=float))[None, :]
+    plon = np.radians(np.asarray(lons, dtype=float))[None, :]
+    cos_plat = np.cos(plat)
+    for start in range(0, len(olat), chunk_size):
+        rows = slice(start, min(start + chunk_size, len(olat)))
+        phi1 = olat[rows, None]
+        a = np.sin((plat - phi1) / 2) ** 2 + np.cos(phi1) * cos_plat * np.sin((plon - olon[rows, None]) / 2) ** 2
+        yield rows, 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine_matrix(
+    origin_lats: np.ndarray,
+    origin_lons: np.ndarray,
+    lats: np.ndarray,
+    lons: np.ndarray,
+    chunk_size: int = 1024,
+) -> np.ndarray:
+    result = np.empty((len(origin_lats), len(lats)))
+    for rows, block in haversine_chunks(origin_lats, origin_lons, lats, lons, chunk_size):
+        result[rows] = block
+    return result
+
+
+def within_km_indices(
+    lat: float,
+    lon: float,
+    lats: np.ndarray,
+    lons: np.ndarray,
+    km: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Indices and distances of the points within `km` of the origin, in input order."""
+    distances = haversine_many(lat, lon, lats, lons)
+    indices = np.flatnonzero(distances <= km)
+    return indices, distances[indices]
+
+
 def filter_within_km(
     rows: Iterable[dict],
     lat: float,
@@ -23,13 +83,10 @@ def filter_within_km(
     lat_key: str = "lat",
     lon_key: str = "lon",
 ) -> list[dict]:
-    results = []
-    for row in rows:
-        if row.get(lat_key) is None or row.get(lon_key) is None:
-            continue
-        distance = haversine_km(lat, lon, row[lat_key], row[lon_key])
-        if distance <= km:
-            row = dict(row)
-            row["distance_km"] = round(distance, 2)
-            results.append(row)
-    return results
+    rows = [row for row in rows if row.get(lat_key) is not None and row.get(lon_key) is not None]
+    if not rows:
+        return []
+    lats = np.fromiter((row[lat_key] for row in rows), dtype=float, count=len(rows))
+    lons = np.fromiter((row[lon_key] for row in rows), dtype=float, count=len(rows))
+    indices, distances = within_km_indices(lat, lon, lats, lons, km)
+    return [{**rows[i], "distance_km": round(float(d), 2)} for i, d in zip(indices, distances)]
@@ -4,22 +4,27 @@ import csv
 from io import StringIO
 from typing import Any
 
+import numpy as np
+
+from app.boundaries import ADMIN_LEVELS, load_admin_areas
 from app.db import SessionLocal
 from app.models import Facility
 from app.agents.langgraph_pipeline import build_extraction_graph, ExtractionState
 from app.anomalies import refresh_anomalies
+from app.versioning import bump_version
 
 
 def ingest_csv(content: str) -> dict[str, Any]:
-    reader = csv.DictReader(StringIO(content))
+    rows = list(csv.DictReader(StringIO(content)))
+    admin = _admin_assignment(rows)
     facilities = []
     with SessionLocal() as session:
-        for row in reader:
+        for i, row in enumerate(rows):
             facility = Facility(
                 name=row.get("name") or "Unknown Facility",
                 country=row.get("country"),
-                region=row.get("region"),
-                district=row.get("district"),
+                region=admin["region"][i] or row.get("region"),
+                district=admin["district"][i] or row.get("district"),
                 lat=_to_float(row.get("lat")),
                 lon=_to_float(row.get("lon")),
                 source_row_id=row.get("source_row_id"),
@@ -29,6 +34,8 @@ def ingest_csv(content: str) -> dict[str, Any]:
                     "operating_rooms": _to_int(row.get("operating_rooms")),
                     "specialties": row.get("specialties"),
                     "source_row_id": row.get("source_row_id"),
+                    "source_region": row.get("region"),
+                    "source_district": row.get("district"),
                 },
                 raw_text_json={
                     "capability_notes": row.get("capability_notes"),
@@ -62,9 +69,22 @@ def ingest_csv(content: str) -> dict[str, Any]:
         )
 
     refresh_anomalies()
+    bump_version()
     return {"ingested": len(facilities)}
 
 
+def _admin_assignment(rows: list[dict[str, Any]]) -> dict[str, list[str | None]]:
+    """Admin areas from the boundary polygons, in bulk; None entries keep the CSV value."""
+    assigned: dict[str, list[str | None]] = {level: [None] * len(rows) for level in ADMIN_LEVELS}
+    areas = load_admin_areas()
+    if areas is None or not rows:
+        return assigned
+    lats = np.array([_to_float(row.get("lat")) for row in rows], dtype=float)
+    lons = np.array([_to_float(row.get("lon")) for row in rows], dtype=float)
+    assigned.update(areas.assign(lats, lons))
+    return assigned
+
+
 def _to_float(value: str | None) -> float | None:
     if value is None or value == "":
         return None
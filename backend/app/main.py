@@ -6,19 +6,26 @@ if __package__ is None:
 
     sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
+import csv
 import json
-from typing import Any
+from io import StringIO
+from typing import Any, Iterator
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+import numpy as np
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from app.db import SessionLocal, engine
 from app.models import Base, Facility, Extraction, EvidenceSpan, AgentTrace, PlannerQuery, Anomaly
-from app.schemas import PlannerRequest, PlannerResponse, EvidenceCitation
+from app.schemas import PlannerRequest, PlannerResponse, EvidenceCitation, NearestProvidersRequest
 from app.ingest import ingest_csv
 from app.agents import tools as toolset
 from app.agents.langchain_agent import route_query, explain_results, SUPPORTED_TOOLS
 from app.config import settings
+from app.spatial import iter_nearest_providers
+from app.versioning import current_version
+from app import tiles
 
 
 Base.metadata.create_all(bind=engine)
@@ -99,7 +106,12 @@ def facility_profile(facility_id: int) -> dict[str, Any]:
 
 
 @app.get("/facilities/geo")
-def facilities_geo() -> dict[str, Any]:
+def facilities_geo(bbox: str | None = None, zoom: int | None = None) -> Any:
+    if bbox is not None or zoom is not None:
+        if bbox is None or zoom is None:
+            raise HTTPException(status_code=400, detail="bbox and zoom must be given together")
+        view = tiles.bbox_view(_parse_bbox(bbox), zoom)
+        return JSONResponse(view, headers=_tile_headers(view["version"]))
     with SessionLocal() as session:
         facilities = session.query(Facility).all()
         rows = []
@@ -118,6 +130,71 @@ def facilities_geo() -> dict[str, Any]:
         return {"facilities": rows}
 
 
+@app.get("/facilities/geo/tiles/{z}/{x}/{y}")
+def facilities_geo_tile(z: int, x: int, y: int) -> JSONResponse:
+    if not 0 <= z <= tiles.MAX_ZOOM or not (0 <= x < 2**z and 0 <= y < 2**z):
+        raise HTTPException(status_code=400, detail="Invalid tile coordinates")
+    version = current_version()
+    return JSONResponse(tiles.tile(version, z, x, y), headers=_tile_headers(version))
+
+
+def _parse_bbox(value: str) -> tuple[float, float, float, float]:
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in value.split(","))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="bbox must be min_lon,min_lat,max_lon,max_lat") from exc
+    if min_lon > max_lon or min_lat > max_lat:
+        raise HTTPException(status_code=400, detail="bbox must be min_lon,min_lat,max_lon,max_lat")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def _tile_headers(version: int) -> dict[str, str]:
+    return {"Cache-Control": "public, max-age=60", "X-Dataset-Version": str(version)}
+
+
+@app.post("/geo/nearest")
+def geo_nearest(payload: NearestProvidersRequest) -> StreamingResponse:
+    lats = np.array([origin.lat for origin in payload.origins], dtype=float)
+    lons = np.array([origin.lon for origin in payload.origins], dtype=float)
+    ids = [origin.id for origin in payload.origins]
+    return _ndjson(iter_nearest_providers(payload.capability, lats, lons, ids, payload.k))
+
+
+@app.post("/geo/nearest/upload")
+async def geo_nearest_upload(
+    file: UploadFile = File(...),
+    capability: str = Form(...),
+    k: int = Form(1),
+) -> StreamingResponse:
+    if not 1 <= k <= 50:
+        raise HTTPException(status_code=400, detail="k must be between 1 and 50")
+    content = await file.read()
+    try:
+        decoded = content.decode("utf-8")
+    except UnicodeDecodeError as exc:
+        raise HTTPException(status_code=400, detail="File must be utf-8") from exc
+    reader = csv.DictReader(StringIO(decoded))
+    if not reader.fieldnames or not {"lat", "lon"} <= set(reader.fieldnames):
+        raise HTTPException(status_code=400, detail="CSV must have lat and lon columns")
+    ids, lats, lons = [], [], []
+    for row in reader:
+        ids.append(row.get("id"))
+        lats.append(_csv_float(row.get("lat")))
+        lons.append(_csv_float(row.get("lon")))
+    return _ndjson(iter_nearest_providers(capability, np.array(lats), np.array(lons), ids, k))
+
+
+def _ndjson(records: Iterator[dict[str, Any]]) -> StreamingResponse:
+    return StreamingResponse((json.dumps(record) + "\n" for record in records), media_type="application/x-ndjson")
+
+
+def _csv_float(value: str | None) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
 @app.post("/planner/ask", response_model=PlannerResponse)
 def planner_ask(payload: PlannerRequest) -> PlannerResponse:
     if not settings.openai_api_key:
@@ -175,8 +252,19 @@ def _run_deterministic_tool(tool_name: str, args: dict[str, Any]) -> dict[str, A
             args.get("lon"),
             args.get("km"),
         )
+    if tool_name == "geo_nearest_with_capability":
+        return toolset.geo_nearest_with_capability(
+            args.get("capability", ""),
+            args.get("lat"),
+            args.get("lon"),
+            args.get("k", 5),
+        )
     if tool_name == "geo_cold_spots":
-        return toolset.geo_cold_spots(args.get("service_or_bundle", ""), args.get("km", 50), args.get("region_level", "region"))
+        return toolset.geo_cold_spots(
+            args.get("service_or_bundle", ""),
+            args.get("km") or 50,
+            args.get("region_level") or "region",
+        )
     if tool_name == "anomaly_unrealistic_procedure_breadth":
         return toolset.anomaly_unrealistic_procedure_breadth()
     if tool_name == "correlation_feature_movement":
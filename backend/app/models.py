@@ -89,3 +89,11 @@ class PlannerQuery(Base):
     citations_json = Column(JSON, nullable=True)
     trace_id = Column(Integer, ForeignKey("agent_traces.id"), nullable=False)
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+
+class DatasetVersion(Base):
+    __tablename__ = "dataset_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
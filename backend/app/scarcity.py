@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from app.capabilities import registry_matrix
+from app.spatial import CapabilityIndex, capability_index
+from app.versioning import current_version
+
+
+@dataclass
+class ScarcityProfile:
+    """Per-capability distances that answer sole-provider questions for any radius."""
+
+    index: CapabilityIndex
+    other_provider_km: np.ndarray
+    dependent_provider: np.ndarray
+    dependent_km: np.ndarray
+    dependent_beds: np.ndarray
+
+
+def _build(capability: str, version: int) -> ScarcityProfile:
+    index = capability_index(capability)
+    providers = index.facilities
+    # k=2 against the providers themselves: column 0 is the provider, column 1 its nearest peer.
+    _, peers = index.grid.nearest_many(providers.lat, providers.lon, 2)
+
+    registry = registry_matrix(version)
+    outside = ~registry.provides(capability)
+    nearest, distances = index.grid.nearest_many(registry.lat[outside], registry.lon[outside], 1)
+    beds = np.array(
+        [(registry.raw_structured[i] or {}).get("bed_count") or 0 for i in np.flatnonzero(outside)],
+        dtype=float,
+    )
+    return ScarcityProfile(
+        index=index,
+        other_provider_km=peers[:, 1],
+        dependent_provider=nearest[:, 0],
+        dependent_km=distances[:, 0],
+        dependent_beds=beds,
+    )
+
+
+_lock = threading.Lock()
+_profiles: dict[str, tuple[int, ScarcityProfile]] = {}
+
+
+def scarcity_profile(capability: str) -> ScarcityProfile:
+    version = current_version()
+    with _lock:
+        cached = _profiles.get(capability)
+        if cached and cached[0] == version:
+            return cached[1]
+    profile = _build(capability, version)
+    with _lock:
+        for key in [key for key, (built, _) in _profiles.items() if built != version]:
+            del _profiles[key]
+        _profiles[capability] = (version, profile)
+    return profile
+
+
+def sole_providers(capability: str, km: float, region: str | None = None, limit: int = 50) -> dict[str, Any]:
+    """Providers with no other provider of `capability` within `km`, and who depends on them.
+
+    A non-provider facility depends on a provider when that provider is its nearest one
+    and lies within `km`; bed counts of dependent facilities stand in for population.
+    """
+    profile = scarcity_profile(capability)
+    providers = profile.index.facilities
+    count = len(providers)
+
+    served = (profile.dependent_provider >= 0) & (profile.dependent_km <= km)
+    dependents = np.bincount(profile.dependent_provider[served], minlength=count)
+    beds = np.bincount(profile.dependent_provider[served], weights=profile.dependent_beds[served], minlength=count)
+    sole = (profile.other_provider_km > km) & np.isfinite(providers.lat) & np.isfinite(providers.lon)
+
+    rows = []
+    for i in range(count):
+        if region and providers.regions[i] != region:
+            continue
+        other = profile.other_provider_km[i]
+        rows.append(
+            {
+                "facility_id": int(providers.facility_ids[i]),
+                "name": providers.names[i],
+                "region": providers.regions[i],
+                "sole_provider": bool(sole[i]),
+                "nearest_other_provider_km": round(float(other), 2) if np.isfinite(other) else None,
+                "dependent_facilities": int(dependents[i]),
+                "dependent_beds": int(beds[i]),
+            }
+        )
+    rows.sort(key=lambda row: (not row["sole_provider"], -row["dependent_facilities"], -row["dependent_beds"]))
+    sole_count = sum(1 for row in rows if row["sole_provider"])
+    return {
+        "capability": capability,
+        "km": km,
+        "provider_count": len(rows),
+        "sole_provider_count": sole_count,
+        "providers": rows[:limit],
+        "dependency": sole_count > 0 or len(rows) <= 2,
+    }
@@ -98,3 +98,15 @@ class PlannerResponse(BaseModel):
     answer_json: dict[str, Any]
     citations: list[EvidenceCitation] = Field(default_factory=list)
     trace_id: int
+
+
+class NearestOrigin(BaseModel):
+    id: Optional[str] = None
+    lat: float
+    lon: float
+
+
+class NearestProvidersRequest(BaseModel):
+    capability: str
+    k: int = Field(default=1, ge=1, le=50)
+    origins: list[NearestOrigin] = Field(default_factory=list)
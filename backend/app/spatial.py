@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import math
+import threading
+from typing import Any, Iterator, Sequence
+
+import numpy as np
+
+from app.capabilities import CapabilityMatrix, registry_matrix
+from app.geo import EARTH_RADIUS_KM, haversine_many, haversine_matrix
+from app.versioning import current_version
+
+KM_PER_DEGREE = 111.195
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+
+
+class GridIndex:
+    """Bucket points into fixed lat/lon cells so radius and k-nearest queries only touch nearby cells.
+
+    Candidates gathered from the covering cells are refined with the exact haversine
+    distance, so results match a full scan.
+    """
+
+    def __init__(self, lat: np.ndarray, lon: np.ndarray, cell_deg: float = 0.25):
+        self.cell_deg = cell_deg
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self.n_rows = int(math.ceil(180.0 / cell_deg)) + 1
+        self.n_cols = int(math.ceil(360.0 / cell_deg))
+
+        valid = np.flatnonzero(np.isfinite(self.lat) & np.isfinite(self.lon))
+        self.size = len(valid)
+        keys = self._row(self.lat[valid]) * self.n_cols + self._col(self.lon[valid])
+        order = np.argsort(keys, kind="stable")
+        self._order = valid[order]
+        cell_keys, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+        self._cells = {int(key): (int(start), int(start + count)) for key, start, count in zip(cell_keys, starts, counts)}
+        self._cell_rows = cell_keys // self.n_cols
+        self._cell_cols = cell_keys % self.n_cols
+        self._cell_keys = cell_keys
+
+    def within_km(self, lat: float, lon: float, km: float) -> tuple[np.ndarray, np.ndarray]:
+        """Indices and distances of points within `km` of the origin, nearest first."""
+        candidates = self._candidates(lat, lon, km)
+        if not len(candidates):
+            return candidates, np.empty(0)
+        distances = haversine_many(lat, lon, self.lat[candidates], self.lon[candidates])
+        keep = distances <= km
+        candidates, distances = candidates[keep], distances[keep]
+        order = np.argsort(distances, kind="stable")
+        return candidates[order], distances[order]
+
+    def nearest(self, lat: float, lon: float, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """The `k` nearest points to the origin, nearest first."""
+        if k <= 0 or self.size == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        radius = self.cell_deg * KM_PER_DEGREE
+        while True:
+            indices, distances = self.within_km(lat, lon, radius)
+            # Every point closer than the k-th hit lies inside the searched radius, so the prefix is exact.
+            if len(indices) >= k or radius >= MAX_DISTANCE_KM:
+                return indices[:k], distances[:k]
+            radius = min(radius * 2, MAX_DISTANCE_KM)
+
+    def nearest_many(self, lats: np.ndarray, lons: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """k-nearest points for many origins; missing neighbours are padded with -1 / inf.
+
+        Origins are grouped by grid cell. Each group shares one candidate set: the
+        points within d_k(centre) + 2 * max d(origin, centre) of the group centre,
+        which by the triangle inequality contains every origin's true k nearest.
+        """
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        indices = np.full((len(lats), k), -1, dtype=np.int64)
+        distances = np.full((len(lats), k), np.inf)
+        if k <= 0 or self.size == 0 or not len(lats):
+            return indices, distances
+
+        valid = np.flatnonzero(np.isfinite(lats) & np.isfinite(lons))
+        keys = self._row(lats[valid]) * self.n_cols + self._col(lons[valid])
+        order = np.argsort(keys, kind="stable")
+        group_keys, starts = np.unique(keys[order], return_index=True)
+        bounds = np.append(starts, len(order))
+        for g in range(len(group_keys)):
+            members = valid[order[bounds[g] : bounds[g + 1]]]
+            centre_lat = float(np.mean(lats[members]))
+            centre_lon = float(np.mean(lons[members]))
+            spread = float(np.max(haversine_many(centre_lat, centre_lon, lats[members], lons[members])))
+            _, centre_distances = self.nearest(centre_lat, centre_lon, k)
+            radius = min(float(centre_distances[-1]) + 2 * spread + 1e-6, MAX_DISTANCE_KM)
+            if len(centre_distances) < k:
+                radius = MAX_DISTANCE_KM
+            candidates = self._candidates(centre_lat, centre_lon, radius)
+            block = haversine_matrix(lats[members], lons[members], self.lat[candidates], self.lon[candidates])
+            take = min(k, len(candidates))
+            nearest = np.argpartition(block, take - 1, axis=1)[:, :take] if take < len(candidates) else np.tile(
+                np.arange(len(candidates)), (len(members), 1)
+            )
+            nearest_distances = np.take_along_axis(block, nearest, axis=1)
+            ranked = np.argsort(nearest_distances, axis=1, kind="stable")
+            indices[members, :take] = candidates[np.take_along_axis(nearest, ranked, axis=1)]
+            distances[members, :take] = np.take_along_axis(nearest_distances, ranked, axis=1)
+        return indices, distances
+
+    def _candidates(self, lat: float, lon: float, km: float) -> np.ndarray:
+        dlat = km / KM_PER_DEGREE
+        lat_lo, lat_hi = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+        row_lo, row_hi = int(self._row(lat_lo)), int(self._row(lat_hi))
+
+        widest = max(abs(lat_lo), abs(lat_hi))
+        if widest >= 89.9:
+            dlon = 180.0
+        else:
+            dlon = min(dlat / math.cos(math.radians(widest)), 180.0)
+        if dlon >= 180.0:
+            cols = None
+        else:
+            col_lo = int(self._col(lon - dlon))
+            span = int(math.ceil(2 * dlon / self.cell_deg)) + 1
+            cols = [(col_lo + step) % self.n_cols for step in range(min(span, self.n_cols))]
+
+        cell_count = (row_hi - row_lo + 1) * (len(cols) if cols is not None else self.n_cols)
+        if cell_count <= len(self._cells):
+            keys = (
+                row * self.n_cols + col
+                for row in range(row_lo, row_hi + 1)
+                for col in (cols if cols is not None else range(self.n_cols))
+            )
+            slices = [self._cells[key] for key in keys if key in self._cells]
+        else:
+            # Wide searches scan the occupied cells instead of enumerating mostly empty ones.
+            mask = (self._cell_rows >= row_lo) & (self._cell_rows <= row_hi)
+            if cols is not None:
+                mask &= np.isin(self._cell_cols, cols)
+            slices = [self._cells[int(key)] for key in self._cell_keys[mask]]
+
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self._order[start:end] for start, end in slices])
+
+    def _row(self, lat):
+        return np.floor((np.asarray(lat) + 90.0) / self.cell_deg).astype(np.int64)
+
+    def _col(self, lon):
+        wrapped = np.mod(np.asarray(lon) + 180.0, 360.0)
+        return np.floor(wrapped / self.cell_deg).astype(np.int64) % self.n_cols
+
+
+class CapabilityIndex:
+    """Grid index over the facilities that provide one capability."""
+
+    def __init__(self, capability: str, matrix: CapabilityMatrix):
+        self.capability = capability
+        self.facilities = matrix.subset(matrix.provides(capability))
+        self.grid = GridIndex(self.facilities.lat, self.facilities.lon)
+
+    def rows(self, indices: np.ndarray, distances: np.ndarray) -> list[dict]:
+        return [
+            {
+                "facility_id": int(self.facilities.facility_ids[i]),
+                "name": self.facilities.names[i],
+                "lat": float(self.facilities.lat[i]),
+                "lon": float(self.facilities.lon[i]),
+                "distance_km": round(float(d), 2),
+            }
+            for i, d in zip(indices, distances)
+        ]
+
+
+def iter_nearest_providers(
+    capability: str,
+    lats: np.ndarray,
+    lons: np.ndarray,
+    ids: Sequence[Any],
+    k: int,
+    chunk_size: int = 5000,
+) -> Iterator[dict[str, Any]]:
+    """Yield one record per origin with its k nearest providers, computed chunk by chunk."""
+    index = capability_index(capability)
+    for start in range(0, len(lats), chunk_size):
+        stop = min(start + chunk_size, len(lats))
+        indices, distances = index.grid.nearest_many(lats[start:stop], lons[start:stop], k)
+        for offset in range(stop - start):
+            row = start + offset
+            found = indices[offset] >= 0
+            yield {
+                "origin": {"id": ids[row], "lat": _finite(lats[row]), "lon": _finite(lons[row])},
+                "providers": index.rows(indices[offset][found], distances[offset][found]),
+            }
+
+
+def _finite(value: float) -> float | None:
+    return float(value) if np.isfinite(value) else None
+
+
+_index_lock = threading.Lock()
+_indexes: dict[str, tuple[int, CapabilityIndex]] = {}
+
+
+def capability_index(capability: str) -> CapabilityIndex:
+    """Capability-partitioned index for the current dataset version, rebuilt lazily after ingest."""
+    version = current_version()
+    with _index_lock:
+        cached = _indexes.get(capability)
+        if cached and cached[0] == version:
+            return cached[1]
+    index = CapabilityIndex(capability, registry_matrix(version))
+    with _index_lock:
+        stale = [key for key, (built, _) in _indexes.items() if built != version]
+        for key in stale:
+            del _indexes[key]
+        _indexes[capability] = (version, index)
+    return index
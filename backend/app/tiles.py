@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import math
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+
+import numpy as np
+
+from app.db import SessionLocal
+from app.models import Facility
+from app.versioning import current_version
+
+MAX_ZOOM = 20
+# Clusters are gridded at 1/8 of a 256px tile, i.e. roughly 32px on screen.
+CLUSTER_DIVISIONS = 8
+# Past this zoom, or when a tile holds few facilities, points are returned individually.
+CLUSTER_MAX_ZOOM = 14
+POINT_THRESHOLD = 200
+MERCATOR_MAX_LAT = 85.05112878
+
+
+@dataclass
+class GeoSnapshot:
+    ids: np.ndarray
+    lat: np.ndarray
+    lon: np.ndarray
+    x: np.ndarray
+    y: np.ndarray
+    properties: list[dict[str, Any]]
+
+    def extent(self) -> list[float] | None:
+        if not len(self.ids):
+            return None
+        return [float(self.lon.min()), float(self.lat.min()), float(self.lon.max()), float(self.lat.max())]
+
+
+def mercator(lat: np.ndarray, lon: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Normalised Web Mercator coordinates in [0, 1), matching slippy-map tile numbering."""
+    lat = np.clip(np.asarray(lat, dtype=float), -MERCATOR_MAX_LAT, MERCATOR_MAX_LAT)
+    x = (np.asarray(lon, dtype=float) + 180.0) / 360.0
+    y = (1.0 - np.log(np.tan(np.radians(lat)) + 1.0 / np.cos(np.radians(lat))) / math.pi) / 2.0
+    return np.clip(x, 0.0, np.nextafter(1.0, 0.0)), np.clip(y, 0.0, np.nextafter(1.0, 0.0))
+
+
+def load_snapshot() -> GeoSnapshot:
+    with SessionLocal() as session:
+        rows = (
+            session.query(Facility)
+            .filter(Facility.lat.isnot(None), Facility.lon.isnot(None))
+            .order_by(Facility.id)
+            .all()
+        )
+        properties = [
+            {
+                "id": f.id,
+                "name": f.name,
+                "region": f.region,
+                "district": f.district,
+                "lat": f.lat,
+                "lon": f.lon,
+                "facility_type": (f.raw_structured_json or {}).get("facility_type"),
+            }
+            for f in rows
+        ]
+    lat = np.array([p["lat"] for p in properties], dtype=float)
+    lon = np.array([p["lon"] for p in properties], dtype=float)
+    x, y = mercator(lat, lon)
+    return GeoSnapshot(np.array([p["id"] for p in properties], dtype=np.int64), lat, lon, x, y, properties)
+
+
+_lock = threading.Lock()
+_snapshot: tuple[int, GeoSnapshot] | None = None
+
+
+def geo_snapshot(version: int) -> GeoSnapshot:
+    global _snapshot
+    with _lock:
+        if _snapshot is None or _snapshot[0] != version:
+            _snapshot = (version, load_snapshot())
+        return _snapshot[1]
+
+
+@lru_cache(maxsize=4096)
+def tile(version: int, z: int, x: int, y: int) -> dict[str, Any]:
+    """Clusters or points for one slippy-map tile; cached per (dataset version, tile)."""
+    snapshot = geo_snapshot(version)
+    scale = 2**z
+    inside = np.flatnonzero((np.floor(snapshot.x * scale) == x) & (np.floor(snapshot.y * scale) == y))
+    payload: dict[str, Any] = {"z": z, "x": x, "y": y, "version": version, "count": int(len(inside))}
+    if z > CLUSTER_MAX_ZOOM or len(inside) <= POINT_THRESHOLD:
+        payload["clusters"] = []
+        payload["facilities"] = [snapshot.properties[i] for i in inside]
+        return payload
+
+    cells = scale * CLUSTER_DIVISIONS
+    rows = np.floor(snapshot.y[inside] * cells).astype(np.int64)
+    keys = rows * cells + np.floor(snapshot.x[inside] * cells).astype(np.int64)
+    unique, first, codes, counts = np.unique(keys, return_index=True, return_inverse=True, return_counts=True)
+    lat = np.bincount(codes, weights=snapshot.lat[inside]) / counts
+    lon = np.bincount(codes, weights=snapshot.lon[inside]) / counts
+    clusters, facilities = [], []
+    for code in range(len(unique)):
+        if counts[code] == 1:
+            facilities.append(snapshot.properties[int(inside[first[code]])])
+        else:
+            clusters.append({"lat": round(float(lat[code]), 6), "lon": round(float(lon[code]), 6), "count": int(counts[code])})
+    payload["clusters"] = clusters
+    payload["facilities"] = facilities
+    return payload
+
+
+def tiles_for_bbox(bbox: tuple[float, float, float, float], zoom: int) -> list[tuple[int, int]]:
+    min_lon, min_lat, max_lon, max_lat = bbox
+    scale = 2**zoom
+    xs, ys = mercator(np.array([max_lat, min_lat]), np.array([min_lon, max_lon]))
+    x0, x1 = int(xs[0] * scale), int(xs[1] * scale)
+    y0, y1 = int(ys[0] * scale), int(ys[1] * scale)
+    return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+
+def bbox_view(bbox: tuple[float, float, float, float], zoom: int, version: int | None = None) -> dict[str, Any]:
+    """Merge the cached tiles covering `bbox` at `zoom` and trim them to the box."""
+    version = current_version() if version is None else version
+    zoom = max(0, min(int(zoom), MAX_ZOOM))
+    min_lon, min_lat, max_lon, max_lat = bbox
+    clusters, facilities = [], []
+    for x, y in tiles_for_bbox(bbox, zoom):
+        payload = tile(version, zoom, x, y)
+        clusters.extend(c for c in payload["clusters"] if _in_bbox(c, bbox))
+        facilities.extend(f for f in payload["facilities"] if _in_bbox(f, bbox))
+    return {
+        "version": version,
+        "zoom": zoom,
+        "bbox": [min_lon, min_lat, max_lon, max_lat],
+        "extent": geo_snapshot(version).extent(),
+        "clusters": clusters,
+        "facilities": facilities,
+    }
+
+
+def _in_bbox(item: dict[str, Any], bbox: tuple[float, float, float, float]) -> bool:
+    return bbox[0] <= item["lon"] <= bbox[2] and bbox[1] <= item["lat"] <= bbox[3]
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal
+from app.models import DatasetVersion
+
+_ROW_ID = 1
+
+
+def current_version(session: Session | None = None) -> int:
+    """Counter bumped whenever facility data changes; caches key their entries on it."""
+    if session is None:
+        with SessionLocal() as owned:
+            return current_version(owned)
+    version = session.scalar(select(DatasetVersion.version).where(DatasetVersion.id == _ROW_ID))
+    return version or 0
+
+
+def bump_version(session: Session | None = None) -> int:
+    if session is None:
+        with SessionLocal() as owned:
+            version = bump_version(owned)
+            owned.commit()
+            return version
+    result = session.execute(
+        update(DatasetVersion).where(DatasetVersion.id == _ROW_ID).values(version=DatasetVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        session.add(DatasetVersion(id=_ROW_ID, version=1))
+        session.flush()
+    return current_version(session)
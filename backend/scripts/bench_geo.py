@@ -0,0 +1,73 @@
+"""Compare the scalar haversine helpers with the NumPy batch API.
+
+Run from backend/: python -m scripts.bench_geo --points 20000 --origins 200
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from app.geo import filter_within_km, haversine_km, haversine_matrix, within_km_indices
+
+
+def _timed(label: str, fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<40} {best * 1000:10.2f} ms")
+    return best
+
+
+def _scalar_filter(rows: list[dict], lat: float, lon: float, km: float) -> list[dict]:
+    results = []
+    for row in rows:
+        distance = haversine_km(lat, lon, row["lat"], row["lon"])
+        if distance <= km:
+            row = dict(row)
+            row["distance_km"] = round(distance, 2)
+            results.append(row)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--origins", type=int, default=200)
+    parser.add_argument("--km", type=float, default=50.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    lats = rng.uniform(-5, 12, args.points)
+    lons = rng.uniform(-3, 2, args.points)
+    rows = [{"facility_id": i, "lat": float(a), "lon": float(b)} for i, (a, b) in enumerate(zip(lats, lons))]
+    origin_lats = rng.uniform(-5, 12, args.origins)
+    origin_lons = rng.uniform(-3, 2, args.origins)
+    lat, lon = float(origin_lats[0]), float(origin_lons[0])
+
+    print(f"{args.points} points, {args.origins} origins, radius {args.km} km")
+    scalar = _timed("scalar filter (dict copies)", lambda: _scalar_filter(rows, lat, lon, args.km), args.repeat)
+    _timed("filter_within_km (vectorized)", lambda: filter_within_km(rows, lat, lon, args.km), args.repeat)
+    batch = _timed("within_km_indices", lambda: within_km_indices(lat, lon, lats, lons, args.km), args.repeat)
+    print(f"{'radius filter speedup':<40} {scalar / batch:10.1f} x")
+
+    pairs = args.origins * args.points
+    scalar_many = _timed(
+        "scalar many-to-many",
+        lambda: [[haversine_km(a, b, c, d) for c, d in zip(lats, lons)] for a, b in zip(origin_lats, origin_lons)],
+        1,
+    )
+    batch_many = _timed(
+        "haversine_matrix (chunked)",
+        lambda: haversine_matrix(origin_lats, origin_lons, lats, lons),
+        args.repeat,
+    )
+    print(f"{'many-to-many speedup':<40} {scalar_many / batch_many:10.1f} x  ({pairs} pairs)")
+
+
+if __name__ == "__main__":
+    main()
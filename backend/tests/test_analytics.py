@@ -0,0 +1,44 @@
+import numpy as np
+
+from app.analytics import co_occurrence, co_occurrence_surprise
+
+
+def test_phi_lift_and_conditional():
+    values = np.array(
+        [
+            [1, 1, 0],
+            [1, 1, 0],
+            [0, 0, 1],
+            [0, 0, 1],
+        ],
+        dtype=bool,
+    )
+    stats = co_occurrence(values)
+    assert stats.n == 4
+    assert stats.phi[0, 1] == 1.0
+    assert stats.phi[0, 2] == -1.0
+    assert stats.lift[0, 1] == 2.0
+    assert stats.conditional[0, 1] == 1.0
+    assert stats.conditional[0, 2] == 0.0
+
+
+def test_constant_feature_has_no_phi():
+    values = np.array([[1, 0], [1, 1]], dtype=bool)
+    stats = co_occurrence(values)
+    assert np.isnan(stats.phi[0, 1])
+
+
+def test_surprise_ranks_split_pairs_highest():
+    values = np.array(
+        [
+            [1, 1],
+            [1, 1],
+            [0, 0],
+            [0, 0],
+            [1, 0],
+        ],
+        dtype=bool,
+    )
+    scores = co_occurrence_surprise(values, co_occurrence(values))
+    assert int(np.argmax(scores)) == 4
+    assert scores[0] == 0.0
@@ -0,0 +1,53 @@
+import os
+
+os.environ["DATABASE_URL"] = "sqlite+pysqlite:////tmp/vf_agent_test.db"
+
+import numpy as np
+
+from app.boundaries import AdminAreas, STRTree, points_in_rings
+
+
+def _square(x0, y0, size):
+    return [[x0, y0], [x0 + size, y0], [x0 + size, y0 + size], [x0, y0 + size], [x0, y0]]
+
+
+def _feature(level, name, rings):
+    return {
+        "type": "Feature",
+        "properties": {"admin_level": level, "name": name},
+        "geometry": {"type": "Polygon", "coordinates": rings},
+    }
+
+
+def test_str_tree_matches_brute_force():
+    rng = np.random.default_rng(3)
+    lo = rng.uniform(0, 10, (500, 2))
+    boxes = np.hstack([lo, lo + rng.uniform(0.1, 1.0, (500, 2))])
+    x, y = rng.uniform(0, 11, 2000), rng.uniform(0, 11, 2000)
+    tree = STRTree(boxes, capacity=8)
+    found = {(box, int(p)) for box, points in tree.query_points(x, y) for p in points}
+    inside = (x[:, None] >= boxes[:, 0]) & (x[:, None] <= boxes[:, 2]) & (y[:, None] >= boxes[:, 1]) & (y[:, None] <= boxes[:, 3])
+    expected = {(int(b), int(p)) for p, b in zip(*np.nonzero(inside))}
+    assert found == expected
+
+
+def test_points_in_polygon_with_hole():
+    rings = [np.array(_square(0, 0, 10), dtype=float), np.array(_square(4, 4, 2), dtype=float)]
+    inside = points_in_rings(np.array([1.0, 5.0, 11.0]), np.array([1.0, 5.0, 5.0]), rings)
+    assert inside.tolist() == [True, False, False]
+
+
+def test_assigns_regions_and_districts():
+    areas = AdminAreas.from_geojson(
+        {
+            "type": "FeatureCollection",
+            "features": [
+                _feature("region", "West", [_square(0, 0, 10)]),
+                _feature("region", "East", [_square(10, 0, 10)]),
+                _feature("district", "Alpha", [_square(0, 0, 5)]),
+            ],
+        }
+    )
+    assigned = areas.assign(np.array([1.0, 1.0, 50.0, np.nan]), np.array([1.0, 15.0, 50.0, 1.0]))
+    assert assigned["region"] == ["West", "East", None, None]
+    assert assigned["district"] == ["Alpha", None, None, None]
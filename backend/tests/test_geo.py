@@ -0,0 +1,72 @@
+import os
+
+os.environ["DATABASE_URL"] = "sqlite+pysqlite:////tmp/vf_agent_test.db"
+
+import numpy as np
+
+from app.geo import haversine_km, haversine_many, haversine_matrix, within_km_indices
+from app.spatial import GridIndex
+
+
+def _points(n: int = 2000, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-5, 5, n), rng.uniform(30, 40, n)
+
+
+def _brute_force(lat, lon, olat, olon):
+    return np.array([haversine_km(olat, olon, a, b) for a, b in zip(lat, lon)])
+
+
+def test_within_km_matches_full_scan():
+    lat, lon = _points()
+    index = GridIndex(lat, lon)
+    expected = _brute_force(lat, lon, 0.5, 35.0)
+    indices, distances = index.within_km(0.5, 35.0, 60)
+    assert set(indices.tolist()) == set(np.flatnonzero(expected <= 60).tolist())
+    assert np.all(np.diff(distances) >= 0)
+
+
+def test_nearest_matches_full_scan():
+    lat, lon = _points()
+    index = GridIndex(lat, lon)
+    expected = np.argsort(_brute_force(lat, lon, -2.0, 31.0))[:7]
+    indices, _ = index.nearest(-2.0, 31.0, 7)
+    assert indices.tolist() == expected.tolist()
+
+
+def test_index_skips_missing_coordinates_and_wraps_antimeridian():
+    lat = np.array([0.0, np.nan, 0.0])
+    lon = np.array([179.9, 10.0, -179.9])
+    index = GridIndex(lat, lon)
+    indices, distances = index.within_km(0.0, 180.0, 20)
+    assert sorted(indices.tolist()) == [0, 2]
+    assert index.nearest(0.0, 0.0, 5)[0].size == 2
+
+
+def test_batch_distances_match_scalar():
+    lat, lon = _points(200)
+    expected = _brute_force(lat, lon, 1.0, 33.0)
+    assert np.allclose(haversine_many(1.0, 33.0, lat, lon), expected)
+    matrix = haversine_matrix(np.array([1.0, 2.0]), np.array([33.0, 34.0]), lat, lon, chunk_size=1)
+    assert np.allclose(matrix[0], expected)
+    indices, distances = within_km_indices(1.0, 33.0, lat, lon, 150)
+    assert indices.tolist() == np.flatnonzero(expected <= 150).tolist()
+    assert np.allclose(distances, expected[indices])
+
+
+def test_nearest_many_matches_full_scan():
+    lat, lon = _points(3000)
+    index = GridIndex(lat, lon)
+    olat, olon = _points(300, seed=11)
+    indices, distances = index.nearest_many(olat, olon, 3)
+    for row in range(len(olat)):
+        expected = np.argsort(_brute_force(lat, lon, olat[row], olon[row]))[:3]
+        assert indices[row].tolist() == expected.tolist()
+    assert np.all(np.diff(distances, axis=1) >= 0)
+
+
+def test_nearest_many_pads_when_too_few_points():
+    index = GridIndex(np.array([0.0]), np.array([0.0]))
+    indices, distances = index.nearest_many(np.array([1.0, np.nan]), np.array([1.0, 0.0]), 2)
+    assert indices.tolist() == [[0, -1], [-1, -1]]
+    assert np.isinf(distances[0, 1])
@@ -0,0 +1,85 @@
+import json
+import os
+from pathlib import Path
+
+os.environ["DATABASE_URL"] = "sqlite+pysqlite:////tmp/vf_agent_test.db"
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.db import engine
+from app.models import Base
+from app.ingest import ingest_csv
+from app.config import settings
+
+
+def setup_module():
+    settings.openai_api_key = None
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    sample_path = Path(__file__).resolve().parents[1] / "app" / "sample_data" / "sample_facilities.csv"
+    ingest_csv(sample_path.read_text(encoding="utf-8"))
+
+
+client = TestClient(app)
+
+
+def _lines(response):
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_nearest_providers_for_many_origins():
+    origins = [{"id": "a", "lat": 0.8, "lon": 36.3}, {"id": "b", "lat": 1.0, "lon": 36.1}]
+    records = _lines(client.post("/geo/nearest", json={"capability": "maternity", "k": 2, "origins": origins}))
+    assert [r["origin"]["id"] for r in records] == ["a", "b"]
+    for record in records:
+        distances = [p["distance_km"] for p in record["providers"]]
+        assert len(distances) == 2
+        assert distances == sorted(distances)
+
+
+def test_nearest_providers_from_csv_upload():
+    content = "id,lat,lon\nx,0.8,36.3\ny,,\n"
+    response = client.post(
+        "/geo/nearest/upload",
+        files={"file": ("origins.csv", content, "text/csv")},
+        data={"capability": "cardiology", "k": "1"},
+    )
+    records = _lines(response)
+    assert len(records[0]["providers"]) == 1
+    assert records[1]["providers"] == []
+
+
+def test_sole_providers_depend_on_radius():
+    from app.scarcity import sole_providers
+
+    wide = sole_providers("c_section", km=500)
+    narrow = sole_providers("c_section", km=1)
+    assert wide["sole_provider_count"] == 0
+    assert narrow["sole_provider_count"] == narrow["provider_count"] > 0
+    assert sum(p["dependent_facilities"] for p in narrow["providers"]) == 0
+
+
+def test_geo_tiles_cluster_at_low_zoom_and_split_at_high_zoom():
+    from app import tiles
+
+    full = client.get("/facilities/geo").json()["facilities"]
+    world = client.get("/facilities/geo", params={"bbox": "-180,-85,180,85", "zoom": 12}).json()
+    assert len(world["facilities"]) + sum(c["count"] for c in world["clusters"]) == len(full)
+
+    original = tiles.POINT_THRESHOLD
+    tiles.POINT_THRESHOLD = 0
+    tiles.tile.cache_clear()
+    try:
+        coarse = client.get("/facilities/geo", params={"bbox": "-180,-85,180,85", "zoom": 2}).json()
+    finally:
+        tiles.POINT_THRESHOLD = original
+        tiles.tile.cache_clear()
+    assert sum(c["count"] for c in coarse["clusters"]) + len(coarse["facilities"]) == len(full)
+    assert coarse["clusters"]
+
+    response = client.get("/facilities/geo/tiles/0/0/0")
+    assert response.status_code == 200
+    assert response.headers["x-dataset-version"] == str(response.json()["version"])
+    assert client.get("/facilities/geo/tiles/1/5/0").status_code == 400